@@ -1,19 +1,27 @@
 import os
 import asyncio
+import functools
 import json
 import re
 import base64
+import binascii
+import errno
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
 import random
-import string
 import math
 import socket
 import time
+import uuid
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, Dict, Set, Optional, Any, Tuple, Union
-from urllib.parse import urlparse, parse_qs, unquote
+from urllib.parse import urlparse, unquote
 import ipaddress
 from collections import Counter, defaultdict
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone, timedelta
 
 # Third-party libraries
@@ -22,10 +30,9 @@ import aiofiles
 import jdatetime
 
 try:
-    import geoip2.database
-    import geoip2.errors
+    import maxminddb
 except ImportError:
-    print("Error: 'geoip2' library not found. Please run: pip install geoip2")
+    print("Error: 'maxminddb' library not found. Please run: pip install maxminddb")
     exit(1)
 
 try:
@@ -42,8 +49,35 @@ except ImportError:
     print("Error: 'rich' library not found. Please run: pip install rich")
     exit(1)
 
-from bs4 import BeautifulSoup
-from pydantic import BaseModel, Field, model_validator, ValidationError
+try:
+    from selectolax.parser import HTMLParser as SelectolaxHTMLParser
+except ImportError:
+    SelectolaxHTMLParser = None
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+if SelectolaxHTMLParser is None and BeautifulSoup is None:
+    print("Error: no HTML parser found. Please run: pip install selectolax (or beautifulsoup4)")
+    exit(1)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # SIMD base64 codecs; drop-in superset of the stdlib API.
+    import pybase64 as _b64
+except ImportError:
+    _b64 = base64
+
+try:
+    import aiodns
+except ImportError:
+    aiodns = None
 
 # ==============================================================================
 # EXCEPTIONS
@@ -80,6 +114,7 @@ class AppConfig:
     SUBSCRIPTION_LINKS_FILE = DATA_DIR / "subscription_links.json"
     LAST_UPDATE_FILE = DATA_DIR / "last_update.log"
     SEEN_CONFIGS_FILE = DATA_DIR / "seen_configs.json"
+    DNS_CACHE_FILE = DATA_DIR / "dns_cache.json"
     TELEGRAM_REPORT_FILE = DATA_DIR / "telegram_report.log"
     GEOIP_DB_FILE = DATA_DIR / "GeoLite2-Country.mmdb"
     GEOIP_ASN_DB_FILE = DATA_DIR / "GeoLite2-ASN.mmdb"
@@ -97,24 +132,31 @@ class AppConfig:
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
         "Accept-Language": "en-US,en;q=0.5",
     }
-    MAX_CONCURRENT_REQUESTS = 50
+    MAX_CONCURRENT_REQUESTS = 200
+    PER_HOST_CONCURRENCY = 30
     DNS_CACHE_TTL = 300  # seconds
+    DNS_NEGATIVE_TTL = 30  # seconds, for NXDOMAIN/timeouts
+    DNS_CONCURRENCY = 200
 
     # Telegram Scraping Settings
     TELEGRAM_BASE_URL = "https://t.me/s/{}"
+    TELEGRAM_CONCURRENCY = 15
     TELEGRAM_MESSAGE_LIMIT = 75
     TELEGRAM_IGNORE_LAST_UPDATE = True
     MAX_CONFIGS_PER_CHANNEL = 500
 
     # Collector Settings
+    PARSE_PROCESS_THRESHOLD = 20000  # raw links before fanning out to processes
+    PARSE_CHUNK_SIZE = 5000
     ENABLE_SUBSCRIPTION_FETCHING = True
     ENABLE_IP_DEDUPLICATION = True
     ENABLE_SEEN_CONFIG_FILTER = False
     SEEN_CONFIG_TIMEOUT_HOURS = 24
     
     # Connectivity Test Settings
-    ENABLE_CONNECTIVITY_TEST = False 
+    ENABLE_CONNECTIVITY_TEST = False
     CONNECTIVITY_TEST_TIMEOUT = 2.5
+    CONNECTIVITY_CONCURRENCY = 500
     MAX_CONNECTIVITY_TESTS = 2500
     TEST_RETRIES = 1
 
@@ -132,62 +174,108 @@ console = Console()
 # UTILS & HELPERS
 # ==============================================================================
 
+_log_listener: Optional[QueueListener] = None
+
 def setup_logger():
+    # Rich takes its render lock on every emit; hand records to a
+    # background listener thread so coroutines only pay for an enqueue.
+    global _log_listener
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    rich_handler = RichHandler(console=console, rich_tracebacks=True, show_path=False)
+    _log_listener = QueueListener(log_queue, rich_handler, respect_handler_level=True)
+    _log_listener.start()
     logging.basicConfig(
         level=logging.INFO,
         format="%(message)s",
         datefmt="[%X]",
-        handlers=[RichHandler(console=console, rich_tracebacks=True, show_path=False)]
+        handlers=[QueueHandler(log_queue)]
     )
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("httpcore").setLevel(logging.WARNING)
-    logging.getLogger("geoip2").setLevel(logging.WARNING)
     return logging.getLogger("FitexCollector")
 
+def shutdown_logger():
+    if _log_listener is not None:
+        _log_listener.stop()
+
 logger = setup_logger()
 
-COUNTRY_CODE_TO_FLAG = {
-    'AD': '🇦🇩', 'AE': '🇦🇪', 'AF': '🇦🇫', 'AG': '🇦🇬', 'AI': '🇦🇮', 'AL': '🇦🇱', 'AM': '🇦🇲', 'AO': '🇦🇴', 'AQ': '🇦🇶', 'AR': '🇦🇷', 'AS': '🇦🇸', 'AT': '🇦🇹', 'AU': '🇦🇺', 'AW': '🇦🇼', 'AX': '🇦🇽', 'AZ': '🇦🇿', 'BA': '🇧🇦', 'BB': '🇧🇧',
-    'BD': '🇧🇩', 'BE': '🇧🇪', 'BF': '🇧🇫', 'BG': '🇧🇬', 'BH': '🇧🇭', 'BI': '🇧🇮', 'BJ': '🇧🇯', 'BL': '🇧🇱', 'BM': '🇧🇲', 'BN': '🇧🇳', 'BO': '🇧🇴', 'BR': '🇧🇷', 'BS': '🇧🇸', 'BT': '🇧🇹', 'BW': '🇧🇼', 'BY': '🇧🇾', 'BZ': '🇧🇿', 'CA': '🇨🇦',
-    'CC': '🇨🇨', 'CD': '🇨🇩', 'CF': '🇨🇫', 'CG': '🇨🇬', 'CH': '🇨🇭', 'CI': '🇨🇮', 'CK': '🇨🇰', 'CL': '🇨🇱', 'CM': '🇨🇲', 'CN': '🇨🇳', 'CO': '🇨🇴', 'CR': '🇨🇷', 'CU': '🇨🇺', 'CV': '🇨🇻', 'CW': '🇨🇼', 'CX': '🇨🇽', 'CY': '🇨🇾', 'CZ': '🇨🇿',
-    'DE': '🇩🇪', 'DJ': '🇩🇯', 'DK': '🇩🇰', 'DM': '🇩🇲', 'DO': '🇩🇴', 'DZ': '🇩🇿', 'EC': '🇪🇨', 'EE': '🇪🇪', 'EG': '🇪🇬', 'ER': '🇪🇷', 'ES': '🇪🇸', 'ET': '🇪🇹', 'FI': '🇫🇮', 'FJ': '🇫🇯', 'FK': '🇫🇰', 'FM': '🇫🇲', 'FO': '🇫🇴', 'FR': '🇫🇷',
-    'GA': '🇬🇦', 'GB': '🇬🇧', 'GD': '🇬🇩', 'GE': '🇬🇪', 'GF': '🇬🇫', 'GG': '🇬🇬', 'GH': '🇬🇭', 'GI': '🇬🇮', 'GL': '🇬🇱', 'GM': '🇬🇲', 'GN': '🇬🇳', 'GP': '🇬🇵', 'GQ': '🇬🇶', 'GR': '🇬🇷', 'GS': '🇬🇸', 'GT': '🇬🇹', 'GU': '🇬🇺', 'GW': '🇬🇼',
-    'GY': '🇬🇾', 'HK': '🇭🇰', 'HN': '🇭🇳', 'HR': '🇭🇷', 'HT': '🇭🇹', 'HU': '🇭🇺', 'ID': '🇮🇩', 'IE': '🇮🇪', 'IL': '🇮🇱', 'IM': '🇮🇲', 'IN': '🇮🇳', 'IO': '🇮🇴', 'IQ': '🇮🇶', 'IR': '🇮🇷', 'IS': '🇮🇸', 'IT': '🇮🇹', 'JE': '🇯🇪', 'JM': '🇯🇲',
-    'JO': '🇯🇴', 'JP': '🇯🇵', 'KE': '🇰🇪', 'KG': '🇰🇬', 'KH': '🇰🇭', 'KI': '🇰🇮', 'KM': '🇰🇲', 'KN': '🇰🇳', 'KP': '🇰🇵', 'KR': '🇰🇷', 'KW': '🇰🇼', 'KY': '🇰🇾', 'KZ': '🇰🇿', 'LA': '🇱🇦', 'LB': '🇱🇧', 'LC': '🇱🇨', 'LI': '🇱🇮', 'LK': '🇱🇰',
-    'LR': '🇱🇷', 'LS': '🇱🇸', 'LT': '🇱🇹', 'LU': '🇱🇺', 'LV': '🇱🇻', 'LY': '🇱🇾', 'MA': '🇲🇦', 'MC': '🇲🇨', 'MD': '🇲🇩', 'ME': '🇲🇪', 'MF': '🇲🇫', 'MG': '🇲🇬', 'MH': '🇲🇭', 'MK': '🇲🇰', 'ML': '🇲🇱', 'MM': '🇲🇲', 'MN': '🇲🇳', 'MO': '🇲🇴',
-    'MP': '🇲🇵', 'MQ': '🇲🇶', 'MR': '🇲🇷', 'MS': '🇲🇸', 'MT': '🇲🇹', 'MU': '🇲🇺', 'MV': '🇲🇻', 'MW': '🇲🇼', 'MX': '🇲🇽', 'MY': '🇲🇾', 'MZ': '🇲🇿', 'NA': '🇳🇦', 'NC': '🇳🇨', 'NE': '🇳🇪', 'NF': '🇳🇫', 'NG': '🇳🇬', 'NI': '🇳🇮', 'NL': '🇳🇱',
-    'NO': '🇳🇴', 'NP': '🇳🇵', 'NR': '🇳🇷', 'NU': '🇳🇺', 'NZ': '🇳🇿', 'OM': '🇴🇲', 'PA': '🇵🇦', 'PE': '🇵🇪', 'PF': '🇵🇫', 'PG': '🇵🇬', 'PH': '🇵🇭', 'PK': '🇵🇰', 'PL': '🇵🇱', 'PM': '🇵🇲', 'PN': '🇵🇳', 'PR': '🇵🇷', 'PS': '🇵🇸', 'PT': '🇵🇹',
-    'PW': '🇵🇼', 'PY': '🇵🇾', 'QA': '🇶🇦', 'RE': '🇷🇪', 'RO': '🇷🇴', 'RS': '🇷🇸', 'RU': '🇷🇺', 'RW': '🇷🇼', 'SA': '🇸🇦', 'SB': '🇸🇧', 'SC': '🇸🇨', 'SD': '🇸🇩', 'SE': '🇸🇪', 'SG': '🇸🇬', 'SH': '🇸🇭', 'SI': '🇸🇮', 'SJ': '🇸🇯', 'SK': '🇸🇰',
-    'SL': '🇸🇱', 'SM': '🇸🇲', 'SN': '🇸🇳', 'SO': '🇸🇴', 'SR': '🇸🇷', 'SS': '🇸🇸', 'ST': '🇸🇹', 'SV': '🇸🇻', 'SX': '🇸🇽', 'SY': '🇸🇾', 'SZ': '🇸🇿', 'TC': '🇹🇨', 'TD': '🇹🇩', 'TF': '🇹🇫', 'TG': '🇹🇬', 'TH': '🇹🇭', 'TJ': '🇹🇯', 'TK': '🇹🇰',
-    'TL': '🇹🇱', 'TM': '🇹🇲', 'TN': '🇹🇳', 'TO': '🇹🇴', 'TR': '🇹🇷', 'TT': '🇹🇹', 'TV': '🇹🇻', 'TW': '🇹🇼', 'TZ': '🇹🇿', 'UA': '🇺🇦', 'UG': '🇺🇬', 'US': '🇺🇸', 'UY': '🇺🇾', 'UZ': '🇺🇿', 'VA': '🇻🇦', 'VC': '🇻🇨', 'VE': '🇻🇪', 'VG': '🇻🇬',
-    'VI': '🇻🇮', 'VN': '🇻🇳', 'VU': '🇻🇺', 'WF': '🇼🇫', 'WS': '🇼🇸', 'YE': '🇾🇪', 'YT': '🇾🇹', 'ZA': '🇿🇦', 'ZM': '🇿🇲', 'ZW': '🇿🇼', 'XX': '🏳️'
-}
+_DEFAULT_FLAG = '🏳️'
+
+def country_flag(cc: Optional[str]) -> str:
+    # Flag emoji are a closed-form function of the two ASCII letters
+    # (regional indicators), so no lookup table is needed.
+    if not cc or len(cc) != 2 or cc == 'XX':
+        return _DEFAULT_FLAG
+    a, b = ord(cc[0]) - 65, ord(cc[1]) - 65
+    if 0 <= a < 26 and 0 <= b < 26:
+        return chr(0x1F1E6 + a) + chr(0x1F1E6 + b)
+    return _DEFAULT_FLAG
 
 def b64_decode(s: str) -> str:
     s = s.strip()
     s += '=' * (-len(s) % 4)
     try:
-        return base64.urlsafe_b64decode(s).decode('utf-8')
+        return _b64.urlsafe_b64decode(s).decode('utf-8')
     except Exception:
         return ""
 
 def b64_encode(s: str) -> str:
-    return base64.urlsafe_b64encode(s.encode('utf-8')).rstrip(b'=').decode('utf-8')
-
-def is_valid_base64(s: str) -> bool:
+    return _b64.urlsafe_b64encode(s.encode('utf-8')).rstrip(b'=').decode('utf-8')
+
+# Flush threshold for the streaming encoder; chunks are trimmed to a
+# multiple of 3 bytes so no padding appears mid-stream.
+_B64_CHUNK = 24 * 1024
+
+def b64_encode_lines(lines: List[str]) -> str:
+    # Join straight into a bytes buffer and encode it incrementally, so
+    # neither the full joined text nor its full bytes form ever exists
+    # alongside the encoded output.
+    buf = bytearray()
+    parts: List[str] = []
+    first = True
+    for line in lines:
+        if first:
+            first = False
+        else:
+            buf.append(0x0A)
+        buf += line.encode('utf-8')
+        if len(buf) >= _B64_CHUNK:
+            head = len(buf) - (len(buf) % 3)
+            parts.append(_b64.urlsafe_b64encode(bytes(buf[:head])).decode('utf-8'))
+            del buf[:head]
+    parts.append(_b64.urlsafe_b64encode(bytes(buf)).rstrip(b'=').decode('utf-8'))
+    return "".join(parts)
+
+def try_b64_decode(s: str) -> Optional[bytes]:
+    s = s.strip()
     try:
-        s_padded = s + '=' * (-len(s) % 4)
-        base64.b64decode(s_padded, validate=True)
-        return True
-    except Exception:
-        return False
+        return _b64.urlsafe_b64decode(s.encode('utf-8') + b'=' * (-len(s) % 4))
+    except (binascii.Error, ValueError):
+        return None
+
+if orjson is not None:
+    def json_loads(data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+    def json_dumps_compact(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def json_dumps_pretty(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+else:
+    def json_loads(data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def json_dumps_compact(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+    def json_dumps_pretty(obj: Any) -> str:
+        return json.dumps(obj, indent=2)
 
 def get_iran_timezone():
     return timezone(timedelta(hours=3, minutes=30))
 
-def generate_random_uuid_string() -> str:
-    return '-'.join([''.join(random.choices(string.ascii_lowercase + string.digits, k=k)) for k in [8, 4, 4, 4, 12]])
-
 def is_ip_address(address: str) -> bool:
     try:
         ipaddress.ip_address(address)
@@ -195,17 +283,20 @@ def is_ip_address(address: str) -> bool:
     except ValueError:
         return False
 
+_REMARKS_STRIP_RE = re.compile(r'[^\w\s\-\.\:\@\(\)\[\]]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
 def clean_remarks(name: str) -> str:
-    cleaned = re.sub(r'[^\w\s\-\.\:\@\(\)\[\]]', '', name)
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    cleaned = _REMARKS_STRIP_RE.sub('', name)
+    cleaned = _WHITESPACE_RE.sub(' ', cleaned).strip()
     return cleaned if cleaned else "Config"
 
 # ==============================================================================
 # DATA MODELS
 # ==============================================================================
 
-class BaseConfig(BaseModel):
-    model_config = {'str_strip_whitespace': True}
+@dataclass(slots=True, kw_only=True)
+class BaseConfig:
     protocol: str
     host: str
     port: int
@@ -216,47 +307,70 @@ class BaseConfig(BaseModel):
     path: Optional[str] = None
     sni: Optional[str] = None
     fingerprint: Optional[str] = None
-    country: Optional[str] = Field("XX", exclude=True)
-    source_type: str = Field("unknown", exclude=True)
-    ping: Optional[int] = Field(None, exclude=True)
-    asn_org: Optional[str] = Field(None, exclude=True)
-    ip_address: Optional[str] = Field(None, exclude=True)
-
-    def get_deduplication_key(self) -> str:
-        return f"{self.protocol}:{self.host}:{self.port}:{self.uuid}"
+    country: Optional[str] = "XX"
+    source_type: str = "unknown"
+    ping: Optional[int] = None
+    asn_org: Optional[str] = None
+    ip_address: Optional[str] = None
+    _uri: Optional[str] = field(default=None, init=False, repr=False)
+    _uri_bytes: Optional[bytes] = field(default=None, init=False, repr=False)
+
+    def get_deduplication_key(self) -> Tuple[str, str, int, str]:
+        # Tuples hash faster than a formatted string and skip the
+        # per-config allocation.
+        return (self.protocol, self.host, self.port, self.uuid)
 
     def to_uri(self) -> str:
+        # Memoized: the output phase renders each URI several times
+        # (raw list, subscription, category files).
+        if self._uri is None:
+            self._uri = self._build_uri()
+        return self._uri
+
+    def to_uri_bytes(self) -> bytes:
+        # Output files are written as bytes; encoding each URI once lets
+        # the per-file joins skip the str->bytes pass entirely.
+        if self._uri_bytes is None:
+            self._uri_bytes = self.to_uri().encode('utf-8')
+        return self._uri_bytes
+
+    def _build_uri(self) -> str:
         raise NotImplementedError
 
+@dataclass(slots=True, kw_only=True)
 class VmessConfig(BaseConfig):
     protocol: str = 'vmess'
     source_type: str = 'vmess'
-    ps: str
-    add: str
-    v: Any = "2"
+    v: str = "2"
     aid: int = 0
     scy: str = 'auto'
-    net: str
     type: str = 'none'
-    tls: str = ''
-
-    @model_validator(mode='before')
-    def map_fields(cls, values):
-        values['remarks'] = values.get('ps', 'N/A')
-        values['host'] = values.get('add', '')
-        values['uuid'] = values.get('id', '')
-        values['network'] = values.get('net', 'tcp')
-        values['security'] = values.get('tls') or 'none'
-        values['v'] = str(values.get('v', '2'))
-        return values
 
-    def to_uri(self) -> str:
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "VmessConfig":
+        tls = str(data.get('tls') or '')
+        return cls(
+            host=str(data.get('add', '')).strip(),
+            port=int(data['port']),
+            uuid=str(data.get('id', '')).strip(),
+            remarks=str(data.get('ps') or 'N/A'),
+            network=str(data.get('net') or 'tcp'),
+            security=tls or 'none',
+            path=data.get('path') or None,
+            sni=data.get('sni') or None,
+            v=str(data.get('v', '2')),
+            aid=int(data.get('aid') or 0),
+            scy=str(data.get('scy') or 'auto'),
+            type=str(data.get('type') or 'none'),
+        )
+
+    def _build_uri(self) -> str:
         vmess_data = {"v": self.v, "ps": self.remarks, "add": self.host, "port": self.port, "id": self.uuid, "aid": self.aid, "scy": self.scy, "net": self.network, "type": self.type, "host": self.sni, "path": self.path, "tls": self.security if self.security != 'none' else '', "sni": self.sni}
         vmess_data_clean = {k: v for k, v in vmess_data.items() if v is not None and v != ""}
-        json_str = json.dumps(vmess_data_clean, separators=(',', ':'))
-        encoded = base64.b64encode(json_str.encode('utf-8')).decode('utf-8').rstrip("=")
+        encoded = _b64.b64encode(json_dumps_compact(vmess_data_clean)).decode('utf-8').rstrip("=")
         return f"vmess://{encoded}"
 
+@dataclass(slots=True, kw_only=True)
 class VlessConfig(BaseConfig):
     protocol: str = 'vless'
     flow: Optional[str] = None
@@ -265,7 +379,7 @@ class VlessConfig(BaseConfig):
     host_header: Optional[str] = None # Added for xhttp
     mode: Optional[str] = None        # Added for xhttp
 
-    def to_uri(self) -> str:
+    def _build_uri(self) -> str:
         params = {
             'type': self.network,
             'security': self.security,
@@ -283,29 +397,26 @@ class VlessConfig(BaseConfig):
         remarks_encoded = f"#{unquote(self.remarks)}"
         return f"vless://{self.uuid}@{self.host}:{self.port}?{query_string}{remarks_encoded}"
 
+@dataclass(slots=True, kw_only=True)
 class ShadowsocksConfig(BaseConfig):
     protocol: str = 'shadowsocks'
     source_type: str = 'shadowsocks'
-    method: str
-
-    @model_validator(mode='before')
-    def map_fields(cls, values):
-        values['uuid'] = values.get('password', '')
-        return values
+    method: str = ''
 
-    def to_uri(self) -> str:
+    def _build_uri(self) -> str:
         user_info = f"{self.method}:{self.uuid}"
-        encoded_user_info = base64.b64encode(user_info.encode('utf-8')).decode('utf-8').rstrip('=')
+        encoded_user_info = _b64.b64encode(user_info.encode('utf-8')).decode('utf-8').rstrip('=')
         remarks_encoded = f"#{unquote(self.remarks)}"
         return f"ss://{encoded_user_info}@{self.host}:{self.port}{remarks_encoded}"
 
+@dataclass(slots=True, kw_only=True)
 class Hysteria2Config(BaseConfig):
     protocol: str = 'hysteria2'
     insecure: Optional[int] = None
     obfs: Optional[str] = None
-    obfs_password: Optional[str] = Field(None, alias='obfs-password')
+    obfs_password: Optional[str] = None
 
-    def to_uri(self) -> str:
+    def _build_uri(self) -> str:
         params = {'sni': self.sni, 'insecure': self.insecure, 'obfs': self.obfs, 'obfs-password': self.obfs_password}
         query_string = '&'.join([f"{k}={v}" for k, v in params.items() if v is not None])
         remarks_encoded = f"#{unquote(self.remarks)}"
@@ -317,11 +428,48 @@ class Hysteria2Config(BaseConfig):
 
 class AsyncHttpClient:
     _client: Optional[httpx.AsyncClient] = None
+    _host_semaphores: Dict[str, asyncio.Semaphore] = {}
+    _dns_cache: Dict[Tuple, Tuple[Any, float]] = {}
+
+    @classmethod
+    def _install_dns_cache(cls):
+        # httpx has no DNS cache of its own, so every request pays a fresh
+        # getaddrinfo; wrap the loop resolver with a TTL cache instead.
+        loop = asyncio.get_running_loop()
+        if getattr(loop, "_fitex_dns_cached", False): return
+        original = loop.getaddrinfo
+
+        async def cached_getaddrinfo(host, port, *, family=0, type=0, proto=0, flags=0):
+            key = (host, port, family, type, proto, flags)
+            hit = cls._dns_cache.get(key)
+            if hit and hit[1] > time.monotonic():
+                return hit[0]
+            result = await original(host, port, family=family, type=type, proto=proto, flags=flags)
+            cls._dns_cache[key] = (result, time.monotonic() + CONFIG.DNS_CACHE_TTL)
+            return result
+
+        loop.getaddrinfo = cached_getaddrinfo
+        loop._fitex_dns_cached = True
+
+    @classmethod
+    def _host_semaphore(cls, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).hostname or ""
+        sem = cls._host_semaphores.get(host)
+        if sem is None:
+            sem = cls._host_semaphores[host] = asyncio.Semaphore(CONFIG.PER_HOST_CONCURRENCY)
+        return sem
 
     @classmethod
     async def get_client(cls) -> httpx.AsyncClient:
         if cls._client is None or cls._client.is_closed:
-            limits = httpx.Limits(max_connections=CONFIG.MAX_CONCURRENT_REQUESTS, max_keepalive_connections=20)
+            cls._install_dns_cache()
+            # Keepalive matches the connection cap so burst stages reuse
+            # TLS sessions instead of renegotiating between batches.
+            limits = httpx.Limits(
+                max_connections=CONFIG.MAX_CONCURRENT_REQUESTS,
+                max_keepalive_connections=CONFIG.MAX_CONCURRENT_REQUESTS,
+                keepalive_expiry=60.0,
+            )
             cls._client = httpx.AsyncClient(
                 headers=CONFIG.HTTP_HEADERS,
                 timeout=CONFIG.HTTP_TIMEOUT,
@@ -329,7 +477,8 @@ class AsyncHttpClient:
                 http2=True,
                 follow_redirects=True,
                 limits=limits,
-                verify=False
+                verify=False,
+                trust_env=False
             )
         return cls._client
 
@@ -343,7 +492,8 @@ class AsyncHttpClient:
     async def get(cls, url: str) -> Tuple[int, str]:
         client = await cls.get_client()
         try:
-            response = await client.get(url)
+            async with cls._host_semaphore(url):
+                response = await client.get(url)
             response.raise_for_status()
             return response.status_code, response.text
         except httpx.RequestError as e:
@@ -353,51 +503,73 @@ class AsyncHttpClient:
         except Exception:
             return 0, ""
 
+def _split_proxy_uri(uri: str, scheme_len: int) -> Optional[Tuple[str, str, int, Dict[str, str], str]]:
+    """Tokenize scheme://user@host:port?k=v&...#fragment with plain str ops.
+
+    These URIs have a fixed shape, so a split-based scan is several times
+    faster than urlparse + parse_qs and avoids the one-element-list
+    wrapping of every query value.
+    """
+    body = uri[scheme_len:]
+    body, _, fragment = body.partition('#')
+    body, _, query = body.partition('?')
+    user, _, host_port = body.rpartition('@')
+    host, _, port_str = host_port.rpartition(':')
+    if not host or not port_str.isdigit():
+        return None
+    params: Dict[str, str] = {}
+    if query:
+        for pair in query.split('&'):
+            k, sep, v = pair.partition('=')
+            if sep and v:
+                params[k] = unquote(v) if '%' in v else v
+    return user, host.strip('[]'), int(port_str), params, fragment
+
 class V2RayParser:
     @staticmethod
     def parse(uri: str, source_type: str = "unknown") -> Optional[BaseConfig]:
         uri = uri.strip()
-        if not uri: return None
-        if "..." in uri or len(uri) < 10: return None
+        if len(uri) < 10 or "..." in uri: return None
 
+        scheme, sep, _ = uri.partition("://")
+        if not sep: return None
+        handler = V2RayParser._DISPATCH.get(scheme.lower())
+        if handler is None: return None
         try:
-            if uri.startswith("vmess://"): return V2RayParser._parse_vmess(uri)
-            elif uri.startswith("vless://"): return V2RayParser._parse_vless(uri)
-            elif uri.startswith("ss://"): return V2RayParser._parse_shadowsocks(uri)
-            elif uri.startswith("hy2://") or uri.startswith("hysteria2://"): return V2RayParser._parse_hysteria2(uri)
-        except (ValidationError, ParsingError, Exception):
-            pass
-        return None
+            return handler(uri)
+        except Exception:
+            return None
 
     @staticmethod
     def _parse_vmess(uri: str) -> Optional[VmessConfig]:
-        b64_data = uri[len("vmess://"):]
-        if not is_valid_base64(b64_data): return None
+        payload = try_b64_decode(uri[len("vmess://"):])
+        if payload is None: return None
         try:
-            data = json.loads(b64_decode(b64_data))
-            return VmessConfig(**data)
+            data = json_loads(payload)
+            return VmessConfig.from_dict(data)
         except Exception: return None
 
     @staticmethod
     def _parse_vless(uri: str) -> Optional[VlessConfig]:
-        parsed_url = urlparse(uri)
-        if not parsed_url.hostname or not parsed_url.port: return None
-        params = parse_qs(parsed_url.query)
+        parts = _split_proxy_uri(uri, len("vless://"))
+        if parts is None: return None
+        user, host, port, params, fragment = parts
+        if not user: return None
         return VlessConfig(
-            uuid=parsed_url.username, 
-            host=parsed_url.hostname, 
-            port=parsed_url.port, 
-            remarks=unquote(parsed_url.fragment) if parsed_url.fragment else f"{parsed_url.hostname}:{parsed_url.port}",
-            network=params.get('type', ['tcp'])[0], 
-            security=params.get('security', ['none'])[0], 
-            path=unquote(params.get('path', [None])[0]) if params.get('path') else None, 
-            sni=params.get('sni', [None])[0], 
-            fingerprint=params.get('fp', [None])[0], 
-            flow=params.get('flow', [None])[0], 
-            pbk=params.get('pbk', [None])[0], 
-            sid=params.get('sid', [None])[0],
-            host_header=params.get('host', [None])[0], # Capture host param
-            mode=params.get('mode', [None])[0]         # Capture mode param
+            uuid=user,
+            host=host,
+            port=port,
+            remarks=unquote(fragment) if fragment else f"{host}:{port}",
+            network=params.get('type', 'tcp'),
+            security=params.get('security', 'none'),
+            path=params.get('path'),
+            sni=params.get('sni'),
+            fingerprint=params.get('fp'),
+            flow=params.get('flow'),
+            pbk=params.get('pbk'),
+            sid=params.get('sid'),
+            host_header=params.get('host'),
+            mode=params.get('mode')
         )
 
     @staticmethod
@@ -413,45 +585,71 @@ class V2RayParser:
         try:
             cleaned_host = host.strip("[]")
             port = int(port_str)
-            return ShadowsocksConfig(host=cleaned_host, port=port, remarks=unquote(remarks_part), method=method, password=password)
+            return ShadowsocksConfig(host=cleaned_host, port=port, uuid=password, remarks=unquote(remarks_part), method=method)
         except ValueError:
             return None
             
     @staticmethod
     def _parse_hysteria2(uri: str) -> Optional[Hysteria2Config]:
-        uri = uri.replace("hy2://", "hysteria2://")
-        parsed_url = urlparse(uri)
-        if not parsed_url.hostname or not parsed_url.port: return None
-        params = parse_qs(parsed_url.query)
+        if uri.startswith("hy2://"):
+            uri = "hysteria2://" + uri[len("hy2://"):]
+        parts = _split_proxy_uri(uri, len("hysteria2://"))
+        if parts is None: return None
+        user, host, port, params, fragment = parts
         return Hysteria2Config(
-            uuid=parsed_url.username or '',
-            host=parsed_url.hostname,
-            port=parsed_url.port,
-            remarks=unquote(parsed_url.fragment),
-            sni=params.get('sni', [None])[0],
-            insecure=int(params.get('insecure', [0])[0]),
-            obfs=params.get('obfs', [None])[0],
-            obfs_password=params.get('obfs-password', [None])[0],
+            uuid=user,
+            host=host,
+            port=port,
+            remarks=unquote(fragment),
+            sni=params.get('sni'),
+            insecure=int(params.get('insecure', 0)),
+            obfs=params.get('obfs'),
+            obfs_password=params.get('obfs-password'),
         )
 
-class RawConfigCollector:
-    PATTERNS = {
-        "ss": r"(ss://[^\s<>#]+)", 
-        "vmess": r"(vmess://[^\s<>#]+)", 
-        "vless": r"(vless://(?:(?!=reality)[^\s<>#])+(?=[\s<>#]))", 
-        "reality": r"(vless://[^\s<>#]+?security=reality[^\s<>#]*)",
-        "hysteria2": r"((?:hy2|hysteria2)://[^\s<>#]+)",
+    _DISPATCH = {
+        "vmess": _parse_vmess,
+        "vless": _parse_vless,
+        "ss": _parse_shadowsocks,
+        "hy2": _parse_hysteria2,
+        "hysteria2": _parse_hysteria2,
     }
 
+_RAW_PATTERNS = {
+    "ss": r"ss://[^\s<>#]+",
+    "vmess": r"vmess://[^\s<>#]+",
+    "vless": r"vless://(?:(?!=reality)[^\s<>#])+(?=[\s<>#])",
+    "reality": r"vless://[^\s<>#]+?security=reality[^\s<>#]*",
+    "hysteria2": r"(?:hy2|hysteria2)://[^\s<>#]+",
+}
+
+# "reality" must precede "vless" so full reality URIs win the alternation.
+_SCAN_ORDER = ("reality", "vless", "vmess", "ss", "hysteria2")
+_FUSED_RE = re.compile(
+    r"(?<![\w-])(?:" + "|".join(f"(?P<{name}>{_RAW_PATTERNS[name]})" for name in _SCAN_ORDER) + r")",
+    re.IGNORECASE,
+)
+
+_FRAGMENT_RE = re.compile(r"#[^#]*$")
+
+class RawConfigCollector:
+    FUSED = _FUSED_RE
+    SCHEME_MARKERS = ("vless://", "vmess://", "ss://", "hy2://", "hysteria2://")
+
     @classmethod
     def find_all(cls, text_content: str) -> Dict[str, List[str]]:
-        all_matches = {}
-        for name, pattern in cls.PATTERNS.items():
-            full_pattern = r"(?<![\w-])" + pattern
-            matches = re.findall(full_pattern, text_content, re.IGNORECASE)
-            cleaned_matches = [re.sub(r"#[^#]*$", "", m) for m in matches if "…" not in m]
-            if cleaned_matches:
-                all_matches[name] = cleaned_matches
+        # Cheap substring probes skip the regex engine entirely on the
+        # large share of fetched pages that carry no configs at all.
+        if "://" not in text_content:
+            return {}
+        probe = text_content.lower()
+        if not any(marker in probe for marker in cls.SCHEME_MARKERS):
+            return {}
+        all_matches: Dict[str, List[str]] = defaultdict(list)
+        for m in cls.FUSED.finditer(text_content):
+            uri = m.group(0)
+            if "…" in uri: continue
+            all_matches[m.lastgroup].append(_FRAGMENT_RE.sub("", uri))
         return all_matches
 
 # ==============================================================================
@@ -461,7 +659,7 @@ class RawConfigCollector:
 class TelegramScraper:
     def __init__(self, channels: List[str], since_datetime: datetime):
         self.channels, self.since_datetime = channels, since_datetime
-        self.configs_by_channel: Dict[str, List[str]] = {}
+        self.configs_by_channel: Dict[str, Set[str]] = {}
         self.successful_channels: List[Tuple[str, int]] = []
         self.failed_channels: List[str] = []
 
@@ -475,30 +673,36 @@ class TelegramScraper:
             console=console
         ) as progress:
             task = progress.add_task("Channels", total=len(self.channels))
-            batch_size = 15
-            for i in range(0, len(self.channels), batch_size):
-                batch = self.channels[i:i + batch_size]
-                tasks = [self._scrape_channel_with_retry(ch) for ch in batch]
-                results = await asyncio.gather(*tasks)
-                for j, res in enumerate(results):
-                    channel = batch[j]
-                    if res:
-                        count = sum(len(v) for v in res.values())
-                        if count > 0:
-                            self.successful_channels.append((channel, count))
-                            self.configs_by_channel[channel] = [c for sub in res.values() for c in sub]
-                    else:
-                        self.failed_channels.append(channel)
-                    progress.update(task, advance=1)
-                await asyncio.sleep(1)
-        self._write_report()
-
-    def _write_report(self):
+            sem = asyncio.Semaphore(CONFIG.TELEGRAM_CONCURRENCY)
+
+            async def _guarded(channel: str):
+                async with sem:
+                    return channel, await self._scrape_channel_with_retry(channel)
+
+            done, total = 0, len(self.channels)
+            for coro in asyncio.as_completed([_guarded(ch) for ch in self.channels]):
+                channel, res = await coro
+                if res:
+                    count = sum(len(v) for v in res.values())
+                    if count > 0:
+                        self.successful_channels.append((channel, count))
+                        self.configs_by_channel[channel] = {c for sub in res.values() for c in sub}
+                else:
+                    self.failed_channels.append(channel)
+                done += 1
+                # Rich rerenders on every update; batching keeps the live
+                # display off the hot path.
+                if done % 10 == 0 or done == total:
+                    progress.update(task, completed=done)
+        await self._write_report()
+
+    async def _write_report(self):
         now = datetime.now(get_iran_timezone())
         report = f"REPORT DATE: {now.strftime('%Y-%m-%d %H:%M:%S')}\n"
         report += f"Total: {len(self.channels)} | Success: {len(self.successful_channels)} | Failed: {len(self.failed_channels)}\n\n"
         for ch, cnt in self.successful_channels: report += f"{ch}: {cnt}\n"
-        with open(CONFIG.TELEGRAM_REPORT_FILE, "w", encoding="utf-8") as f: f.write(report)
+        async with aiofiles.open(CONFIG.TELEGRAM_REPORT_FILE, "w", encoding="utf-8") as f:
+            await f.write(report)
 
     async def _scrape_channel_with_retry(self, channel: str) -> Optional[Dict[str, List[str]]]:
         for _ in range(2):
@@ -506,28 +710,46 @@ class TelegramScraper:
             status, html = await AsyncHttpClient.get(url)
             if status == 200 and html:
                 try:
-                    soup = BeautifulSoup(html, "html.parser")
-                    messages = soup.find_all("div", class_="tgme_widget_message", limit=CONFIG.TELEGRAM_MESSAGE_LIMIT)
-                    if not messages: return {}
-                    configs = defaultdict(list)
-                    count = 0
-                    for msg in messages:
-                        text_div = msg.find("div", class_="tgme_widget_message_text")
-                        if text_div:
-                            found = RawConfigCollector.find_all(text_div.get_text('\n', strip=True))
-                            for k, v in found.items():
-                                configs[k].extend(v)
-                                count += len(v)
-                        if count >= CONFIG.MAX_CONFIGS_PER_CHANNEL: break
-                    return configs
+                    # HTML parsing and regex scanning are pure CPU; run them
+                    # off-loop so other channels keep fetching meanwhile.
+                    return await asyncio.to_thread(self._extract_configs, html)
                 except Exception: pass
             await asyncio.sleep(2)
         return None
 
+    @classmethod
+    def _extract_configs(cls, html: str) -> Dict[str, List[str]]:
+        texts = cls._extract_message_texts(html)
+        if not texts: return {}
+        # URIs contain no whitespace, so a newline join cannot
+        # bleed matches across message boundaries.
+        configs = RawConfigCollector.find_all("\n".join(texts))
+        total = 0
+        for k in list(configs):
+            remaining = CONFIG.MAX_CONFIGS_PER_CHANNEL - total
+            if remaining <= 0:
+                del configs[k]
+            else:
+                configs[k] = configs[k][:remaining]
+                total += len(configs[k])
+        return configs
+
+    _MESSAGE_TEXT_SELECTOR = "div.tgme_widget_message div.tgme_widget_message_text"
+
+    @classmethod
+    def _extract_message_texts(cls, html: str) -> List[str]:
+        if SelectolaxHTMLParser is not None:
+            tree = SelectolaxHTMLParser(html)
+            nodes = tree.css(cls._MESSAGE_TEXT_SELECTOR)[:CONFIG.TELEGRAM_MESSAGE_LIMIT]
+            return [n.text(separator='\n', strip=True) for n in nodes]
+        soup = BeautifulSoup(html, "html.parser")
+        nodes = soup.select(cls._MESSAGE_TEXT_SELECTOR, limit=CONFIG.TELEGRAM_MESSAGE_LIMIT)
+        return [n.get_text('\n', strip=True) for n in nodes]
+
 class SubscriptionFetcher:
     def __init__(self, sub_links: List[str]):
         self.sub_links = sub_links
-        self.total_configs_by_type: Dict[str, List[str]] = defaultdict(list)
+        self.total_configs_by_type: Dict[str, Set[str]] = defaultdict(set)
 
     async def fetch_all(self):
         with Progress(
@@ -537,15 +759,21 @@ class SubscriptionFetcher:
             MofNCompleteColumn(),
             console=console
         ) as progress:
-            task = progress.add_task("Fetching", total=len(self.sub_links))
+            total = len(self.sub_links)
+            task = progress.add_task("Fetching", total=total)
             tasks = [self._fetch_link(link) for link in self.sub_links]
+            done = 0
             for coro in asyncio.as_completed(tasks):
                 content = await coro
                 if content:
                     found = RawConfigCollector.find_all(content)
                     for k, v in found.items():
-                        self.total_configs_by_type[k].extend(v)
-                progress.update(task, advance=1)
+                        self.total_configs_by_type[k].update(v)
+                done += 1
+                # Rich rerenders on every update; batching keeps the live
+                # display off the hot path.
+                if done % 20 == 0 or done == total:
+                    progress.update(task, completed=done)
 
     async def _fetch_link(self, link: str) -> str:
         try:
@@ -562,77 +790,222 @@ class SubscriptionFetcher:
 # ==============================================================================
 
 class DNSResolver:
-    _cache: Dict[str, str] = {}
-    _lock = asyncio.Lock()
+    # host -> (ip or None for negative entries, absolute expiry)
+    _cache: Dict[str, Tuple[Optional[str], float]] = {}
+    _inflight: Dict[str, asyncio.Future] = {}
+    _resolver = None
+
+    @classmethod
+    def _get_resolver(cls):
+        if cls._resolver is None:
+            cls._resolver = aiodns.DNSResolver(nameservers=["1.1.1.1", "8.8.8.8"], timeout=2.0, tries=2)
+        return cls._resolver
 
     @classmethod
     async def resolve(cls, host: str) -> Optional[str]:
         if is_ip_address(host): return host
-        async with cls._lock:
-            if host in cls._cache: return cls._cache[host]
+        # Dict reads/writes are atomic under the GIL and coroutines only
+        # interleave at awaits, so no lock is needed around the cache.
+        entry = cls._cache.get(host)
+        if entry and entry[1] > time.time():
+            return entry[0]
+        # Singleflight: concurrent misses for the same host share one
+        # query instead of racing duplicate lookups.
+        fut = cls._inflight.get(host)
+        if fut is not None:
+            return await fut
+        fut = asyncio.get_running_loop().create_future()
+        cls._inflight[host] = fut
         try:
-            info = await asyncio.get_event_loop().getaddrinfo(host, None, family=socket.AF_INET)
-            ip = info[0][4][0]
-            async with cls._lock: cls._cache[host] = ip
+            ip = await cls._query(host)
+            ttl = CONFIG.DNS_CACHE_TTL if ip else CONFIG.DNS_NEGATIVE_TTL
+            cls._cache[host] = (ip, time.time() + ttl)
+            fut.set_result(ip)
             return ip
-        except: return None
+        except BaseException:
+            fut.cancel()
+            raise
+        finally:
+            cls._inflight.pop(host, None)
+
+    @classmethod
+    def load_cache(cls):
+        if not CONFIG.DNS_CACHE_FILE.exists(): return
+        try:
+            data = json_loads(CONFIG.DNS_CACHE_FILE.read_bytes())
+            now = time.time()
+            cls._cache = {h: (ip, expiry) for h, (ip, expiry) in data.items() if expiry > now}
+        except Exception:
+            cls._cache = {}
+
+    @classmethod
+    def save_cache(cls):
+        try:
+            payload = {h: [ip, expiry] for h, (ip, expiry) in cls._cache.items() if ip}
+            CONFIG.DNS_CACHE_FILE.write_bytes(json_dumps_compact(payload))
+        except Exception: pass
+
+    @classmethod
+    async def _query(cls, host: str) -> Optional[str]:
+        if aiodns is not None:
+            # c-ares issues real async UDP queries, so lookups are not
+            # bottlenecked on the default thread-pool executor.
+            try:
+                result = await cls._get_resolver().gethostbyname(host, socket.AF_INET)
+                return result.addresses[0] if result.addresses else None
+            except (aiodns.error.DNSError, asyncio.TimeoutError):
+                return None
+        try:
+            info = await asyncio.get_event_loop().getaddrinfo(host, None, family=socket.AF_INET)
+            return info[0][4][0]
+        except (socket.gaierror, OSError): return None
 
 class Geolocation:
-    _country_reader: Optional[geoip2.database.Reader] = None
-    _asn_reader: Optional[geoip2.database.Reader] = None
+    _country_reader = None
+    _asn_reader = None
+
+    @staticmethod
+    def _open(path: Path):
+        # MODE_MMAP_EXT uses the C extension; fall back to whatever
+        # maxminddb picks when it is not compiled in.
+        try:
+            return maxminddb.open_database(str(path), maxminddb.MODE_MMAP_EXT)
+        except Exception:
+            try: return maxminddb.open_database(str(path))
+            except Exception: return None
 
     @classmethod
     def initialize(cls):
         if CONFIG.GEOIP_DB_FILE.exists():
-            try: cls._country_reader = geoip2.database.Reader(str(CONFIG.GEOIP_DB_FILE))
-            except: pass
+            cls._country_reader = cls._open(CONFIG.GEOIP_DB_FILE)
         if CONFIG.GEOIP_ASN_DB_FILE.exists():
-            try: cls._asn_reader = geoip2.database.Reader(str(CONFIG.GEOIP_ASN_DB_FILE))
-            except: pass
+            cls._asn_reader = cls._open(CONFIG.GEOIP_ASN_DB_FILE)
 
     @classmethod
     def get_info(cls, ip: str) -> Tuple[str, Optional[str]]:
         country, asn = "XX", None
         if not cls._country_reader or not ip: return country, asn
-        try:
-            res = cls._country_reader.country(ip)
-            country = res.country.iso_code or "XX"
-        except: pass
+        if '.' in ip and ':' not in ip:
+            # IPv4: country allocations practically never split below /24,
+            # so cache by prefix and collapse the vast majority of lookups.
+            country = _country_for_slash24(ip.rpartition('.')[0])
+        else:
+            country = cls._lookup_country(ip)
         if cls._asn_reader:
             try:
-                res = cls._asn_reader.asn(ip)
-                asn = res.autonomous_system_organization
-            except: pass
+                rec = cls._asn_reader.get(ip)
+                if rec: asn = rec.get("autonomous_system_organization")
+            except ValueError: pass
         return country, asn
 
+    @classmethod
+    def _lookup_country(cls, ip: str) -> str:
+        try:
+            rec = cls._country_reader.get(ip)
+            return ((rec or {}).get("country") or {}).get("iso_code") or "XX"
+        except ValueError: return "XX"
+
     @classmethod
     def close(cls):
         if cls._country_reader: cls._country_reader.close()
         if cls._asn_reader: cls._asn_reader.close()
 
+@functools.lru_cache(maxsize=65536)
+def _country_for_slash24(prefix: str) -> str:
+    return Geolocation._lookup_country(prefix + ".0")
+
+_PROTO_FULL_MAP = {
+    'vmess': 'VMESS', 'vless': 'VLESS', 'trojan': 'TROJAN',
+    'shadowsocks': 'SHADOWSOCKS', 'hysteria2': 'HYSTERIA2'
+}
+
+_SEC_MAP = {'tls': 'TLS', 'xtls': 'XTLS', 'none': 'NTLS', '': 'NTLS', None: 'NTLS'}
+
+# Deletes characters that are not filesystem-safe from output filenames;
+# a translate table is a plain C scan with no regex engine involved.
+_SAFE_FILENAME_TRANS = str.maketrans('', '', '\\/*?:"<>|')
+
+# Many configs share a datacenter; sanitize each distinct ASN name once.
+_ASN_CLEAN_MEMO: Dict[str, str] = {}
+
+def _asn_filename(asn_org: str) -> str:
+    name = _ASN_CLEAN_MEMO.get(asn_org)
+    if name is None:
+        name = _ASN_CLEAN_MEMO[asn_org] = asn_org.translate(_SAFE_FILENAME_TRANS).replace(" ", "_")
+    return name
+
+def _parse_chunk(proto: str, links: List[str]) -> List[BaseConfig]:
+    """Parse a batch of raw links; module-level so worker processes can pickle it."""
+    parsed = []
+    for link in links:
+        obj = V2RayParser.parse(link, proto)
+        if obj is not None:
+            parsed.append(obj)
+    return parsed
+
 class ConfigProcessor:
-    def __init__(self, raw_configs: Dict[str, List[str]]):
+    def __init__(self, raw_configs: Dict[str, Set[str]]):
         self.raw_configs = raw_configs
-        self.parsed_configs: List[BaseConfig] = []
-        self.unique_configs: Dict[str, BaseConfig] = {}
+        self.configs: List[BaseConfig] = []
+        self._seen_keys: Set[Tuple[str, str, int, str]] = set()
+        # Reservoir size when the connectivity test caps how many configs
+        # survive; 0 disables sampling and keeps everything.
+        self._reservoir_k = CONFIG.MAX_CONNECTIVITY_TESTS if CONFIG.ENABLE_CONNECTIVITY_TEST else 0
+        self._unique_count = 0
+
+    def _insert_unique(self, obj: BaseConfig):
+        # Primary Deduplication (Protocol + Host + Port + UUID); the key
+        # is only ever used for membership, so a set beats a keyed dict.
+        key = obj.get_deduplication_key()
+        if key in self._seen_keys:
+            return
+        self._seen_keys.add(key)
+        if not self._reservoir_k:
+            self.configs.append(obj)
+            return
+        # Algorithm R: a uniform sample of size K without ever holding
+        # the oversized collection.
+        i = self._unique_count
+        self._unique_count += 1
+        if len(self.configs) < self._reservoir_k:
+            self.configs.append(obj)
+        else:
+            j = random.randint(0, i)
+            if j < self._reservoir_k:
+                self.configs[j] = obj
 
     async def process(self):
         console.log("[cyan]Parsing configurations...[/cyan]")
-        for proto, links in self.raw_configs.items():
-            for link in links:
-                obj = V2RayParser.parse(link, proto)
-                if obj: self.parsed_configs.append(obj)
-        
-        # Primary Deduplication (Protocol + Host + Port + UUID)
-        for c in self.parsed_configs:
-            self.unique_configs[c.get_deduplication_key()] = c
-        
-        console.log(f"[green]Unique configs after parsing: {len(self.unique_configs)}[/green]")
-        
-        if CONFIG.ENABLE_CONNECTIVITY_TEST and len(self.unique_configs) > CONFIG.MAX_CONNECTIVITY_TESTS:
-            console.log(f"[yellow]Sampling {CONFIG.MAX_CONNECTIVITY_TESTS} configs from {len(self.unique_configs)}...[/yellow]")
-            sampled_keys = random.sample(list(self.unique_configs.keys()), CONFIG.MAX_CONNECTIVITY_TESTS)
-            self.unique_configs = {k: self.unique_configs[k] for k in sampled_keys}
+        total_links = sum(len(links) for links in self.raw_configs.values())
+        if total_links >= CONFIG.PARSE_PROCESS_THRESHOLD and (os.cpu_count() or 1) > 1:
+            # Parsing is pure-Python CPU work; fan big batches out to
+            # worker processes to get around the GIL.
+            loop = asyncio.get_running_loop()
+            chunks = [
+                (proto, links[i:i + CONFIG.PARSE_CHUNK_SIZE])
+                for proto, link_set in self.raw_configs.items()
+                for links in (list(link_set),)
+                for i in range(0, len(links), CONFIG.PARSE_CHUNK_SIZE)
+            ]
+            with ProcessPoolExecutor() as pool:
+                batches = await asyncio.gather(
+                    *[loop.run_in_executor(pool, _parse_chunk, proto, chunk) for proto, chunk in chunks]
+                )
+            for batch in batches:
+                for obj in batch:
+                    self._insert_unique(obj)
+        else:
+            for proto, links in self.raw_configs.items():
+                for link in links:
+                    obj = V2RayParser.parse(link, proto)
+                    if obj is not None:
+                        self._insert_unique(obj)
+
+        self._seen_keys.clear()
+        console.log(f"[green]Unique configs after parsing: {max(self._unique_count, len(self.configs))}[/green]")
+
+        if self._reservoir_k and self._unique_count > self._reservoir_k:
+            console.log(f"[yellow]Sampled {len(self.configs)} configs from {self._unique_count}...[/yellow]")
 
         await self._enrich_data()
         
@@ -646,48 +1019,85 @@ class ConfigProcessor:
 
     def _deduplicate_by_ip_uuid(self):
         console.log("[cyan]Running secondary deduplication (UUID + IP + Port)...[/cyan]")
-        final_dedup = {}
-        for c in self.unique_configs.values():
+        final_dedup: Dict[Tuple[str, str, int], BaseConfig] = {}
+        for c in self.configs:
             target_addr = c.ip_address if c.ip_address else c.host
-            key = f"{c.uuid}:{target_addr}:{c.port}"
-            
+            key = (c.uuid, target_addr, c.port)
+
             if key not in final_dedup:
                 final_dedup[key] = c
             else:
                 if c.ip_address and not final_dedup[key].ip_address:
                     final_dedup[key] = c
-        
-        removed = len(self.unique_configs) - len(final_dedup)
-        self.unique_configs = final_dedup
-        console.log(f"[green]Removed {removed} duplicates based on IP/UUID. Remaining: {len(self.unique_configs)}[/green]")
+
+        removed = len(self.configs) - len(final_dedup)
+        self.configs = list(final_dedup.values())
+        console.log(f"[green]Removed {removed} duplicates based on IP/UUID. Remaining: {len(self.configs)}[/green]")
 
     async def _enrich_data(self):
-        hosts = {c.host for c in self.unique_configs.values()}
-        console.log(f"[cyan]Resolving DNS for {len(hosts)} hosts...[/cyan]")
-        tasks = [DNSResolver.resolve(h) for h in hosts]
-        results = await asyncio.gather(*tasks)
-        dns_map = dict(zip(hosts, results))
-        for c in self.unique_configs.values():
-            c.ip_address = dns_map.get(c.host)
-            if c.ip_address:
-                c.country, c.asn_org = Geolocation.get_info(c.ip_address)
+        # Partition up front: IP-literal hosts skip the resolver entirely.
+        hosts = {c.host for c in self.configs}
+        name_hosts = [h for h in hosts if not is_ip_address(h)]
+        console.log(f"[cyan]Resolving DNS for {len(name_hosts)} hosts...[/cyan]")
+        sem = asyncio.Semaphore(CONFIG.DNS_CONCURRENCY)
+
+        async def _resolve(host: str) -> Optional[str]:
+            async with sem:
+                return await DNSResolver.resolve(host)
+
+        results = await asyncio.gather(*[_resolve(h) for h in name_hosts])
+        dns_map = dict(zip(name_hosts, results))
+        # Many configs share a backend IP; look each unique IP up once,
+        # off-loop so mmdb decoding doesn't stall the scheduler.
+        unique_ips = {ip for ip in dns_map.values() if ip}
+        unique_ips.update(h for h in hosts if is_ip_address(h))
+        geo_cache = await asyncio.to_thread(self._bulk_geo, unique_ips)
+        # host -> (ip, country, asn) so the assignment pass is one lookup.
+        meta: Dict[str, Tuple[Optional[str], str, Optional[str]]] = {}
+        for h in hosts:
+            ip = h if is_ip_address(h) else dns_map.get(h)
+            if ip:
+                meta[h] = (ip, *geo_cache[ip])
+            else:
+                meta[h] = (None, "XX", None)
+        for c in self.configs:
+            c.ip_address, c.country, c.asn_org = meta[c.host]
+
+    @staticmethod
+    def _bulk_geo(ips: Set[str]) -> Dict[str, Tuple[str, Optional[str]]]:
+        return {ip: Geolocation.get_info(ip) for ip in ips}
 
     async def _test_tcp(self, config: BaseConfig) -> int:
         target = config.ip_address or config.host
         if not target: return 9999
+        loop = asyncio.get_running_loop()
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        except OSError as e:
+            if e.errno in (errno.EMFILE, errno.ENFILE): return -1
+            return 9999
+        sock.setblocking(False)
         try:
             start = time.monotonic()
-            reader, writer = await asyncio.wait_for(
-                asyncio.open_connection(target, config.port), timeout=CONFIG.CONNECTIVITY_TEST_TIMEOUT
+            await asyncio.wait_for(
+                loop.sock_connect(sock, (target, config.port)), timeout=CONFIG.CONNECTIVITY_TEST_TIMEOUT
             )
-            ping = int((time.monotonic() - start) * 1000)
-            writer.close()
-            await writer.wait_closed()
-            return ping
-        except: return 9999
+            return int((time.monotonic() - start) * 1000)
+        except (asyncio.TimeoutError, OSError, ValueError):
+            return 9999
+        finally:
+            sock.close()
 
     async def _test_connectivity(self):
-        configs = list(self.unique_configs.values())
+        # Many configs share an endpoint after DNS resolution; probe each
+        # (address, port) once and fan the result back to all members.
+        groups: Dict[Tuple[str, int], List[BaseConfig]] = defaultdict(list)
+        for c in self.configs:
+            groups[(c.ip_address or c.host, c.port)].append(c)
+        work: asyncio.Queue = asyncio.Queue()
+        for members in groups.values():
+            work.put_nowait(members)
+        n_workers = min(CONFIG.CONNECTIVITY_CONCURRENCY, max(1, work.qsize()))
         with Progress(
             SpinnerColumn(),
             TextColumn("[bold yellow]Testing Connectivity..."),
@@ -695,139 +1105,280 @@ class ConfigProcessor:
             MofNCompleteColumn(),
             console=console
         ) as progress:
-            task = progress.add_task("Ping", total=len(configs))
-            sem = asyncio.Semaphore(100)
-            async def _worker(c):
-                async with sem:
-                    ping = await self._test_tcp(c)
-                    if ping < 2000: c.ping = ping
-                    progress.update(task, advance=1)
-            await asyncio.gather(*[_worker(c) for c in configs])
-        self.unique_configs = {k: v for k, v in self.unique_configs.items() if v.ping}
-        console.log(f"[bold green]Active configs: {len(self.unique_configs)}[/bold green]")
+            task = progress.add_task("Ping", total=len(groups))
+            active = n_workers
+            done, total = 0, len(groups)
+
+            # A fixed pool pulling from a queue keeps memory and scheduler
+            # load at O(workers) instead of one Task per endpoint.
+            async def _worker():
+                nonlocal active, done
+                while True:
+                    try:
+                        members = work.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    ping = await self._test_tcp(members[0])
+                    if ping == -1:
+                        # Out of file descriptors: requeue the group and
+                        # retire this worker to shed concurrency.
+                        work.put_nowait(members)
+                        if active > 50:
+                            active -= 1
+                            return
+                        await asyncio.sleep(0.1)
+                        continue
+                    if ping < 2000:
+                        for c in members: c.ping = ping
+                    done += 1
+                    # Batched: one rerender per 50 probes, not per probe.
+                    if done % 50 == 0 or done == total:
+                        progress.update(task, completed=done)
+
+            await asyncio.gather(*[_worker() for _ in range(n_workers)])
+        self.configs = [c for c in self.configs if c.ping]
+        console.log(f"[bold green]Active configs: {len(self.configs)}[/bold green]")
 
     def _format_remarks(self):
-        for c in self.unique_configs.values():
-            proto_full_map = {
-                'vmess': 'VMESS', 'vless': 'VLESS', 'trojan': 'TROJAN', 
-                'shadowsocks': 'SHADOWSOCKS', 'hysteria2': 'HYSTERIA2'
-            }
-            proto = proto_full_map.get(c.protocol, c.protocol.upper())
+        for c in self.configs:
+            proto = _PROTO_FULL_MAP.get(c.protocol) or c.protocol.upper()
             if c.source_type == 'reality':
                 sec = 'RLT'
-            elif c.security == 'tls':
-                sec = 'TLS'
-            elif c.security == 'xtls':
-                sec = 'XTLS'
-            elif c.security == 'none' or not c.security:
-                sec = 'NTLS'
             else:
-                sec = c.security.upper()
+                sec = _SEC_MAP.get(c.security) or c.security.upper()
             net = (c.network or 'tcp').upper()
-            flag = COUNTRY_CODE_TO_FLAG.get(c.country, "🏳️")
+            flag = country_flag(c.country)
             ip_str = c.ip_address if c.ip_address else "N/A"
             asn_str = f" - {c.asn_org}" if c.asn_org else ""
             c.remarks = f"{c.country} {flag} ┇ {proto}-{net}-{sec}{asn_str} ┇ {ip_str}"
 
     def get_results(self) -> List[BaseConfig]:
-        configs = list(self.unique_configs.values())
-        random.shuffle(configs)
+        configs = list(self.configs)
         if CONFIG.ENABLE_CONNECTIVITY_TEST:
-            return sorted(configs, key=lambda x: x.ping if x.ping is not None else 999999)
+            # Sorting by ping supersedes the shuffle, so skip it entirely.
+            configs.sort(key=lambda x: x.ping if x.ping is not None else 999999)
+        else:
+            random.shuffle(configs)
         return configs
 
 # ==============================================================================
 # OUTPUT GENERATORS (CLASH, SINGBOX, HTML)
 # ==============================================================================
 
-class ConfigConverter:
-    @staticmethod
-    def to_clash_yaml(configs: List[BaseConfig]) -> str:
-        proxies = []
-        for c in configs:
-            if isinstance(c, VmessConfig):
-                proxies.append(f"""  - name: "{c.remarks}"
+_CLASH_VMESS_TMPL = """  - name: "{name}"
     type: vmess
-    server: {c.host}
-    port: {c.port}
-    uuid: {c.uuid}
-    alterId: {c.aid}
+    server: {server}
+    port: {port}
+    uuid: {uuid}
+    alterId: {aid}
     cipher: auto
-    tls: {str(c.security == 'tls').lower()}
+    tls: {tls}
     skip-cert-verify: true
-    network: {c.network}
-    servername: {c.sni or ''}
+    network: {network}
+    servername: {sni}
     ws-opts:
-      path: {c.path or '/'}
-""")
-            elif isinstance(c, VlessConfig):
-                proxies.append(f"""  - name: "{c.remarks}"
+      path: {path}
+"""
+
+_CLASH_VLESS_TMPL = """  - name: "{name}"
     type: vless
-    server: {c.host}
-    port: {c.port}
-    uuid: {c.uuid}
-    tls: {str(c.security == 'tls').lower()}
-    network: {c.network}
-    servername: {c.sni or ''}
-    client-fingerprint: {c.fingerprint or 'chrome'}
+    server: {server}
+    port: {port}
+    uuid: {uuid}
+    tls: {tls}
+    network: {network}
+    servername: {sni}
+    client-fingerprint: {fingerprint}
     skip-cert-verify: true
     ws-opts:
-      path: {c.path or '/'}
-""")
+      path: {path}
+"""
+
+# YAML booleans for the templates; indexing by the comparison result
+# avoids a str()+lower() round-trip per proxy.
+_BOOLSTR = ('false', 'true')
+
+def _clash_vmess_entry(c: "VmessConfig") -> str:
+    return _CLASH_VMESS_TMPL.format(
+        name=c.remarks, server=c.host, port=c.port, uuid=c.uuid,
+        aid=c.aid, tls=_BOOLSTR[c.security == 'tls'],
+        network=c.network, sni=c.sni or '', path=c.path or '/'
+    )
+
+def _clash_vless_entry(c: "VlessConfig") -> str:
+    return _CLASH_VLESS_TMPL.format(
+        name=c.remarks, server=c.host, port=c.port, uuid=c.uuid,
+        tls=_BOOLSTR[c.security == 'tls'], network=c.network,
+        sni=c.sni or '', fingerprint=c.fingerprint or 'chrome',
+        path=c.path or '/'
+    )
+
+# Concrete config classes are never subclassed, so dispatching on
+# type(c) replaces the isinstance chain with one dict probe.
+_CLASH_EMITTERS = {VmessConfig: _clash_vmess_entry, VlessConfig: _clash_vless_entry}
+
+# Prototype for the per-outbound tls block: copying a flat dict and
+# overwriting two keys is cheaper than rebuilding the literal per config.
+_SINGBOX_TLS_T = {"enabled": False, "insecure": True, "server_name": ""}
+_TLS_SET = frozenset(('tls', 'reality'))
+
+def _singbox_outbound(c: BaseConfig) -> Optional[Dict[str, Any]]:
+    tls = _SINGBOX_TLS_T.copy()
+    tls["enabled"] = c.security in _TLS_SET
+    tls["server_name"] = c.sni or c.host
+    base = {
+        "tag": c.remarks,
+        "server": c.host,
+        "server_port": c.port,
+        "tls": tls,
+        "transport": {}
+    }
+    if c.network == 'ws':
+        base["transport"] = {"type": "ws", "path": c.path or "/"}
+    if isinstance(c, VmessConfig):
+        base["type"] = "vmess"
+        base["uuid"] = c.uuid
+        base["security"] = "auto"
+        base["alter_id"] = c.aid
+        return base
+    if isinstance(c, VlessConfig):
+        base["type"] = "vless"
+        base["uuid"] = c.uuid
+        if c.flow: base["flow"] = c.flow
+        return base
+    return None
+
+class ConfigConverter:
+    @staticmethod
+    def to_clash_yaml(configs: List[BaseConfig]) -> str:
+        proxies = []
+        for c in configs:
+            emit = _CLASH_EMITTERS.get(type(c))
+            if emit is not None:
+                proxies.append(emit(c))
         return "proxies:\n" + "".join(proxies)
 
     @staticmethod
     def to_singbox_json(configs: List[BaseConfig]) -> str:
-        outboards = []
-        for c in configs:
-            base = {
-                "tag": c.remarks,
-                "server": c.host,
-                "server_port": c.port,
-                "tls": {"enabled": c.security in ['tls', 'reality'], "insecure": True, "server_name": c.sni or c.host},
-                "transport": {}
-            }
-            if c.network == 'ws':
-                base["transport"] = {"type": "ws", "path": c.path or "/"}
-            if isinstance(c, VmessConfig):
-                base["type"] = "vmess"
-                base["uuid"] = c.uuid
-                base["security"] = "auto"
-                base["alter_id"] = c.aid
-                outboards.append(base)
-            elif isinstance(c, VlessConfig):
-                base["type"] = "vless"
-                base["uuid"] = c.uuid
-                if c.flow: base["flow"] = c.flow
-                outboards.append(base)
-        return json.dumps({"outbounds": outboards}, indent=2)
+        outbounds = [o for o in map(_singbox_outbound, configs) if o is not None]
+        return json_dumps_pretty({"outbounds": outbounds})
+
+class OutputBuilder:
+    """Accumulates every output artifact in one pass over the results.
+
+    The subscription, raw-link, clash, singbox and category outputs each
+    used to re-walk the configs list independently; feed() emits into all
+    of them at once so the list is traversed a single time.
+    """
 
-class FileManager:
     def __init__(self):
-        pass
+        self.uris: List[str] = []
+        self._uri_bytes: List[bytes] = []
+        self._clash_parts: List[str] = []
+        self._outbounds: List[Dict[str, Any]] = []
+        self.categories: Dict[str, Dict[str, List[BaseConfig]]] = {
+            "protocols": defaultdict(list),
+            "networks": defaultdict(list),
+            "security": defaultdict(list),
+            "countries": defaultdict(list),
+            "datacenters": defaultdict(list),
+        }
+        # Summary stats ride along with the same traversal.
+        self.proto_counts: Counter = Counter()
+        self.country_counts: Counter = Counter()
+        # Bound aliases keep feed() to one attribute hop per category.
+        self._protos = self.categories["protocols"]
+        self._nets = self.categories["networks"]
+        self._secs = self.categories["security"]
+        self._ctys = self.categories["countries"]
+        self._dcs = self.categories["datacenters"]
+
+    def feed(self, c: BaseConfig):
+        self.uris.append(c.to_uri())
+        self._uri_bytes.append(c.to_uri_bytes())
+
+        emit = _CLASH_EMITTERS.get(type(c))
+        if emit is not None:
+            self._clash_parts.append(emit(c))
+
+        outbound = _singbox_outbound(c)
+        if outbound is not None:
+            self._outbounds.append(outbound)
+
+        # Categories
+        self._protos[c.protocol].append(c)
+        self.proto_counts[c.protocol] += 1
+        if c.country and c.country != "XX":
+            self._ctys[c.country].append(c)
+            self.country_counts[c.country] += 1
+        self._nets[c.network or 'tcp'].append(c)
+        if c.source_type == 'reality':
+            sec = 'reality'
+        elif c.security:
+            sec = c.security
+        else:
+            sec = 'none'
+        self._secs[sec].append(c)
+        if c.asn_org:
+            self._dcs[_asn_filename(c.asn_org)].append(c)
+
+    def build(self) -> Tuple[bytes, str, str]:
+        """Return the raw-link, clash-yaml and singbox-json bodies."""
+        return (
+            b"\n".join(self._uri_bytes),
+            "proxies:\n" + "".join(self._clash_parts),
+            json_dumps_pretty({"outbounds": self._outbounds}),
+        )
 
-    async def save_text(self, path: Path, content: str):
-        path.parent.mkdir(parents=True, exist_ok=True)
-        async with aiofiles.open(path, 'w', encoding='utf-8') as f:
-            await f.write(content)
+# Static pieces of the subscription header entries; the signature tags
+# never change between runs, so unquote them once at import.
+_HEADER_SUFFIX = "@127.0.0.1:1080?security=tls&type=tcp&encryption=none#"
+_HEADER_TAGS = tuple(unquote(s) for s in (
+    CONFIG.ADV_SIGNATURE, CONFIG.DNT_SIGNATURE, CONFIG.DEV_SIGNATURE, CONFIG.CUSTOM_SIGNATURE,
+))
+
+class FileManager:
+    # Cap concurrent writes so the gathered output flush cannot exhaust
+    # file descriptors alongside the network pools.
+    WRITE_CONCURRENCY = 32
 
-    def generate_subscription_content(self, configs: List[BaseConfig]) -> str:
+    def __init__(self):
+        self._write_sem = asyncio.Semaphore(self.WRITE_CONCURRENCY)
+        self._made_dirs: Set[Path] = set()
+
+    def _ensure_dir(self, parent: Path):
+        if parent not in self._made_dirs:
+            parent.mkdir(parents=True, exist_ok=True)
+            self._made_dirs.add(parent)
+
+    def ensure_dirs(self, paths: List[Path]):
+        # Pre-create every parent before the gathered writes start, so
+        # the write tasks themselves never touch the directory tree.
+        for parent in {p.parent for p in paths}:
+            self._ensure_dir(parent)
+
+    async def save_text(self, path: Path, content: Union[str, bytes]):
+        self._ensure_dir(path.parent)
+        data = content if isinstance(content, bytes) else content.encode('utf-8')
+        async with self._write_sem:
+            # One thread hop for the whole write beats aiofiles' per-call
+            # open/write/close round-trips for these small payloads.
+            await asyncio.to_thread(path.write_bytes, data)
+
+    def generate_subscription_content(self, uris: List[str]) -> str:
         jalali_now = jdatetime.datetime.now().strftime("%Y/%m/%d %H:%M")
         header_configs = [
-            f"vless://{generate_random_uuid_string()}@127.0.0.1:1080?security=tls&type=tcp&encryption=none#{unquote(f'📅 Update: {jalali_now}')}",
-            f"vless://{generate_random_uuid_string()}@127.0.0.1:1080?security=tls&type=tcp&encryption=none#{unquote(CONFIG.ADV_SIGNATURE)}",
-            f"vless://{generate_random_uuid_string()}@127.0.0.1:1080?security=tls&type=tcp&encryption=none#{unquote(CONFIG.DNT_SIGNATURE)}",
-            f"vless://{generate_random_uuid_string()}@127.0.0.1:1080?security=tls&type=tcp&encryption=none#{unquote(CONFIG.DEV_SIGNATURE)}",
-            f"vless://{generate_random_uuid_string()}@127.0.0.1:1080?security=tls&type=tcp&encryption=none#{unquote(CONFIG.CUSTOM_SIGNATURE)}"
+            f"vless://{uuid.uuid4().hex}{_HEADER_SUFFIX}{tag}"
+            for tag in (f"📅 Update: {jalali_now}", *_HEADER_TAGS)
         ]
-        body_configs = [c.to_uri() for c in configs]
-        full_list = header_configs + body_configs
-        return b64_encode("\n".join(full_list))
+        return b64_encode_lines(header_configs + uris)
 
 class V2RayCollectorApp:
     def __init__(self):
         self.file_manager = FileManager()
         self.start_time = datetime.now()
+        self.proto_counter: Counter = Counter()
+        self.country_counter: Counter = Counter()
 
     async def run(self):
         jalali_date = jdatetime.datetime.now().strftime("%Y/%m/%d")
@@ -837,8 +1388,12 @@ class V2RayCollectorApp:
         ))
 
         CONFIG.DATA_DIR.mkdir(exist_ok=True, parents=True)
+        # Build the shared client (and install the DNS cache) before the
+        # first burst of requests rather than inside it.
+        await AsyncHttpClient.get_client()
         await self._download_assets()
         Geolocation.initialize()
+        DNSResolver.load_cache()
 
         sub_links = await self._get_subscription_links()
         tg_channels = await self._get_telegram_channels()
@@ -850,13 +1405,15 @@ class V2RayCollectorApp:
         if CONFIG.ENABLE_SUBSCRIPTION_FETCHING:
             await sub_fetcher.fetch_all()
 
-        all_raw = defaultdict(list)
-        for ch_configs in tg_scraper.configs_by_channel.values():
-            for c in ch_configs:
-                for k, v in RawConfigCollector.find_all(c).items():
-                    all_raw[k].extend(v)
+        all_raw = defaultdict(set)
+        # One regex pass over all channels flattened together; newline
+        # separators keep the \S-based patterns from bleeding across entries.
+        blob = "\n".join(chain.from_iterable(tg_scraper.configs_by_channel.values()))
+        if blob:
+            for k, v in RawConfigCollector.find_all(blob).items():
+                all_raw[k].update(v)
         for k, v in sub_fetcher.total_configs_by_type.items():
-            all_raw[k].extend(v)
+            all_raw[k].update(v)
 
         if not any(all_raw.values()):
             console.log("[red]No configs found! Exiting...[/red]")
@@ -869,18 +1426,26 @@ class V2RayCollectorApp:
         await self._save_outputs(final_configs)
         
         self._print_summary(final_configs)
+        DNSResolver.save_cache()
         await AsyncHttpClient.close()
         Geolocation.close()
 
     async def _download_assets(self):
-        for url, path in [(CONFIG.GEOIP_DB_URL, CONFIG.GEOIP_DB_FILE), (CONFIG.GEOIP_ASN_DB_URL, CONFIG.GEOIP_ASN_DB_FILE)]:
-            if not path.exists():
-                console.log(f"Downloading {path.name}...")
-                try:
-                    client = await AsyncHttpClient.get_client()
-                    resp = await client.get(url, follow_redirects=True)
-                    async with aiofiles.open(path, "wb") as f: await f.write(resp.content)
-                except Exception as e: console.log(f"[red]Failed to download {path.name}: {e}[/red]")
+        pairs = [(CONFIG.GEOIP_DB_URL, CONFIG.GEOIP_DB_FILE), (CONFIG.GEOIP_ASN_DB_URL, CONFIG.GEOIP_ASN_DB_FILE)]
+        missing = [(url, path) for url, path in pairs if not path.exists()]
+        if missing:
+            await asyncio.gather(*(self._download_asset(url, path) for url, path in missing))
+
+    async def _download_asset(self, url: str, path: Path):
+        console.log(f"Downloading {path.name}...")
+        try:
+            client = await AsyncHttpClient.get_client()
+            # Stream to disk so the mmdb never sits fully in memory.
+            async with client.stream("GET", url, follow_redirects=True) as resp:
+                async with aiofiles.open(path, "wb") as f:
+                    async for chunk in resp.aiter_bytes(1 << 16):
+                        await f.write(chunk)
+        except Exception as e: console.log(f"[red]Failed to download {path.name}: {e}[/red]")
 
     async def _get_subscription_links(self) -> List[str]:
         console.log(f"Fetching subscription links from remote...")
@@ -888,7 +1453,7 @@ class V2RayCollectorApp:
         if status == 200 and content:
             try:
                 # Validate JSON before writing
-                data = json.loads(content)
+                data = json_loads(content)
                 if isinstance(data, list) and len(data) > 0: # Ensure not empty
                     console.log(f"[green]Loaded {len(data)} links from remote.[/green]")
                     async with aiofiles.open(CONFIG.SUBSCRIPTION_LINKS_FILE, "w", encoding="utf-8") as f:
@@ -900,7 +1465,7 @@ class V2RayCollectorApp:
         if CONFIG.SUBSCRIPTION_LINKS_FILE.exists():
             try:
                 async with aiofiles.open(CONFIG.SUBSCRIPTION_LINKS_FILE, "r") as f:
-                    data = json.loads(await f.read())
+                    data = json_loads(await f.read())
                     if isinstance(data, list):
                         console.log(f"[green]Loaded {len(data)} links from local file.[/green]")
                         return data
@@ -913,72 +1478,42 @@ class V2RayCollectorApp:
     async def _get_telegram_channels(self) -> List[str]:
         if CONFIG.TELEGRAM_CHANNELS_FILE.exists():
             async with aiofiles.open(CONFIG.TELEGRAM_CHANNELS_FILE, "r") as f:
-                return json.loads(await f.read())
+                return json_loads(await f.read())
         return []
 
     async def _save_outputs(self, configs: List[BaseConfig]):
         console.log("[cyan]Saving outputs...[/cyan]")
         
-        # 1. Base64 Subscription
-        b64_content = self.file_manager.generate_subscription_content(configs)
-        await self.file_manager.save_text(CONFIG.DIRS["subscribe"] / "base64.txt", b64_content)
-        
-        # 2. Raw Links
-        raw_text = "\n".join([c.to_uri() for c in configs])
-        await self.file_manager.save_text(CONFIG.OUTPUT_DIR / "all_configs.txt", raw_text)
-        
-        # 3. Clash Meta
-        clash_yaml = ConfigConverter.to_clash_yaml(configs)
-        await self.file_manager.save_text(CONFIG.DIRS["clash"] / "meta.yaml", clash_yaml)
-        
-        # 4. Sing-box
-        singbox_json = ConfigConverter.to_singbox_json(configs)
-        await self.file_manager.save_text(CONFIG.DIRS["singbox"] / "config.json", singbox_json)
-        
-        # 5. Categorized (Including networks, security, and datacenters)
-        categories = {
-            "protocols": defaultdict(list),
-            "networks": defaultdict(list),
-            "security": defaultdict(list),
-            "countries": defaultdict(list),
-            "datacenters": defaultdict(list), # Re-added
-        }
-
+        # One fused pass over the configs fills every output buffer.
+        builder = OutputBuilder()
+        feed = builder.feed
         for c in configs:
-            # Protocols
-            categories["protocols"][c.protocol].append(c)
-            
-            # Countries
-            if c.country and c.country != "XX":
-                categories["countries"][c.country].append(c)
-                
-            # Networks
-            net = c.network if c.network else 'tcp'
-            categories["networks"][net].append(c)
-            
-            # Security
-            if c.source_type == 'reality':
-                sec = 'reality'
-            elif c.security:
-                sec = c.security
-            else:
-                sec = 'none'
-            categories["security"][sec].append(c)
-
-            # Datacenters
-            if c.asn_org:
-                # Clean ASN name for filename
-                asn_clean = re.sub(r'[\\/*?:"<>|]', "", c.asn_org).replace(" ", "_")
-                categories["datacenters"][asn_clean].append(c)
-        
-        # Save categories
-        for dir_name, items_dict in categories.items():
+            feed(c)
+        self.proto_counter, self.country_counter = builder.proto_counts, builder.country_counts
+
+        raw_links, clash_yaml, singbox_json = builder.build()
+        writes: List[Tuple[Path, Union[str, bytes]]] = [
+            # 1. Base64 Subscription
+            (CONFIG.DIRS["subscribe"] / "base64.txt", self.file_manager.generate_subscription_content(builder.uris)),
+            # 2. Raw Links
+            (CONFIG.OUTPUT_DIR / "all_configs.txt", raw_links),
+            # 3. Clash Meta
+            (CONFIG.DIRS["clash"] / "meta.yaml", clash_yaml),
+            # 4. Sing-box
+            (CONFIG.DIRS["singbox"] / "config.json", singbox_json),
+        ]
+
+        # 5. Categorized (Including networks, security, and datacenters)
+        for dir_name, items_dict in builder.categories.items():
             base_path = CONFIG.DIRS[dir_name]
             for key, items in items_dict.items():
                 if not key: continue
                 # Sanitize key for filename
-                safe_key = re.sub(r'[\\/*?:"<>|]', "", str(key))
-                await self.file_manager.save_text(base_path / f"{safe_key}.txt", "\n".join([x.to_uri() for x in items]))
+                safe_key = str(key).translate(_SAFE_FILENAME_TRANS)
+                writes.append((base_path / f"{safe_key}.txt", b"\n".join([x.to_uri_bytes() for x in items])))
+
+        self.file_manager.ensure_dirs([p for p, _ in writes])
+        await asyncio.gather(*(self.file_manager.save_text(p, content) for p, content in writes))
 
     def _print_summary(self, configs: List[BaseConfig]):
         table = Table(title="📊 Final Statistics", show_header=True, header_style="bold magenta")
@@ -988,13 +1523,11 @@ class V2RayCollectorApp:
         total = len(configs)
         table.add_row("Total Unique Configs", str(total))
         
-        protos = Counter([c.protocol for c in configs])
-        for p, c in protos.most_common():
+        for p, c in self.proto_counter.most_common():
             table.add_row(f"Protocol: {p.upper()}", str(c))
-            
-        top_countries = Counter([c.country for c in configs if c.country != 'XX']).most_common(5)
-        for country, count in top_countries:
-            flag = COUNTRY_CODE_TO_FLAG.get(country, '')
+
+        for country, count in self.country_counter.most_common(5):
+            flag = country_flag(country)
             table.add_row(f"Country: {flag} {country}", str(count))
             
         console.print(table)
@@ -1007,3 +1540,5 @@ if __name__ == "__main__":
         pass
     except Exception as e:
         console.print_exception()
+    finally:
+        shutdown_logger()